@@ -0,0 +1,37 @@
+import os
+import stat as stat_module
+from functools import lru_cache
+
+
+""" Process-wide cache of stat results for the bcbio file finders.
+
+    Loading a project probes many candidate paths, most of which don't exist and
+    none of which change during a run, so both positive and negative lookups are
+    worth remembering. Call invalidate() after writing to a cached path.
+"""
+
+
+@lru_cache(maxsize=8192)
+def cached_stat(path):
+    """ os.stat result for `path`, or None if it doesn't exist (negative entries are cached too) """
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def cached_isfile(path):
+    st = cached_stat(path)
+    return st is not None and stat_module.S_ISREG(st.st_mode)
+
+
+def cached_isdir(path):
+    st = cached_stat(path)
+    return st is not None and stat_module.S_ISDIR(st.st_mode)
+
+
+def invalidate(path=None):
+    """ Drop cached entries after writing a file. lru_cache has no per-key
+        eviction, so the whole cache is cleared; it refills on demand.
+    """
+    cached_stat.cache_clear()
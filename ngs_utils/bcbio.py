@@ -1,12 +1,16 @@
+import gzip
+import os
+import pickle
 import re
 import shutil
 import tarfile
+import zlib
 from collections import defaultdict
-import yaml
-from os import listdir
-from os.path import join, abspath, pardir, splitext, basename, dirname, realpath, isdir, isfile, exists
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join, abspath, pardir, splitext, basename, dirname, realpath, isdir, isfile, exists, getmtime
 
 from .Sample import BaseSample, BaseBatch, BaseProject
+from ._statcache import cached_stat, cached_isfile, invalidate as invalidate_stat_cache
 from .bam_utils import verify_bam
 from .call_process import run, run_simple
 from .config import load_yaml_config
@@ -16,6 +20,24 @@ from .key_genes_utils import get_target_genes, is_small_target
 
 
 CALLER_PRIORITY = ['ensemble', 'strelka2', 'vardict', 'gatk-haplotype']
+CALLER_PRIORITY_INDEX = {c: i for i, c in enumerate(CALLER_PRIORITY)}
+
+GERMLINE_SUFFIX_RE = re.compile(r'-germline$')
+
+DOT_TO_UNDERSCORE = str.maketrans('.', '_')
+
+
+def _callers_from_dict(data, phenotype):
+    if 'germline' in data and phenotype == 'normal':
+        return data.get('germline')
+    return data.get('somatic')
+
+# How to read the `variantcaller` value from the bcbio YAML, dispatched on its type
+_VARIANTCALLERS_DISPATCH = {
+    dict: _callers_from_dict,
+    str: lambda data, phenotype: [data],
+    list: lambda data, phenotype: data,
+}
 
 
 class BcbioSample(BaseSample):
@@ -32,12 +54,32 @@ class BcbioSample(BaseSample):
         self.germline_caller = None
         self.somatic_caller = None
 
+        self._dir_index_by_dir = dict()
+        self._metric_cache = dict()
+        self._find_cache = dict()  # memoized results of the find_* lookups, None included
+        self._files_prefix = None  # <dirpath>/<name-for-files>, precomputed in _set_name_and_paths
+
+    def _dir_index(self, dirpath=None):
+        """ Set of entry names in the sample directory, read once with a single scandir
+            instead of stat'ing every candidate file path
+        """
+        dirpath = dirpath or self.dirpath
+        index = self._dir_index_by_dir.get(dirpath)
+        if index is None:
+            try:
+                with os.scandir(dirpath) as it:
+                    index = {e.name for e in it}
+            except (FileNotFoundError, NotADirectoryError):
+                index = set()
+            self._dir_index_by_dir[dirpath] = index
+        return index
+
     def get_name_for_files(self):  # In case if the sample if symlink from another project, and the name was changed in this one
         return self.old_name or self.name
 
     @staticmethod
     def parse_sample_ids(sample_info):
-        description = str(sample_info['description']).replace('.', '_')
+        description = str(sample_info['description']).translate(DOT_TO_UNDERSCORE)
 
         batch_names = sample_info.get('metadata', dict()).get('batch')
         if isinstance(batch_names, int) or isinstance(batch_names, float):
@@ -45,17 +87,19 @@ class BcbioSample(BaseSample):
         if isinstance(batch_names, str):
             batch_names = [batch_names]
         if batch_names:
-            batch_names = [b.replace('.', '_') for b in batch_names if b]
+            batch_names = [b.translate(DOT_TO_UNDERSCORE) for b in batch_names if b]
 
         return description, batch_names
 
     @staticmethod
     def load_from_sample_info(sample_info, bcbio_project,
                               include_samples=None, exclude_samples=None,
-                              extra_batches=None, silent=False):
-        """ Get sample and batch names and exclude/include based on exclude_samples and include_samples
+                              extra_batches=None, parsed_ids=None, silent=False):
+        """ Get sample and batch names and exclude/include based on exclude_samples and include_samples.
+            `parsed_ids` is an optional pre-computed result of parse_sample_ids, to avoid re-parsing
+            the same sample_info twice when set_samples already did it in the include_samples pre-pass.
         """
-        description, batch_names = BcbioSample.parse_sample_ids(sample_info)
+        description, batch_names = parsed_ids or BcbioSample.parse_sample_ids(sample_info)
 
         if exclude_samples:
             # Sample name
@@ -94,7 +138,7 @@ class BcbioSample(BaseSample):
         s = BcbioSample(parent_project=bcbio_project)
         s.sample_info = sample_info
         if 'description_original' in sample_info:
-            s.old_name = str(sample_info['description_original']).replace('.', '_')
+            s.old_name = str(sample_info['description_original']).translate(DOT_TO_UNDERSCORE)
 
         # Setting phenotype and batches
         s.phenotype = sample_info.get('metadata', dict()).get('phenotype', 'tumor')
@@ -147,10 +191,11 @@ class BcbioSample(BaseSample):
             '-ready.cram',
             '-sort.bam',
         ]
+        index = self._dir_index()
+        prefix = self._files_prefix or adjust_path(join(self.dirpath, name))
         for ext in to_try:
-            fpath = adjust_path(join(self.dirpath, name + ext))
-            if verify_file(fpath):
-                return fpath
+            if name + ext in index:
+                return prefix + ext
 
         input_file = self.sample_info['files']
         if not isinstance(input_file, str):
@@ -170,21 +215,22 @@ class BcbioSample(BaseSample):
 
     def _set_name_and_paths(self, name, variantcallers_data, ensemble=False, silent=False):
         self.raw_name = name
-        self.name = self.raw_name.replace('.', '_')
+        self.name = self.raw_name.translate(DOT_TO_UNDERSCORE)
         self.rgid = self.name
-        self.dirpath = verify_dir(join(self.parent_project.final_dir, self.name))
-        if not verify_dir(self.dirpath, silent=silent):
+        self.dirpath = adjust_path(join(self.parent_project.final_dir, self.name))
+        if not isdir(self.dirpath):
             critical(f'Sample "{self.name}" specified in bcbio YAML is not found in the final directory '
                      f'{self.parent_project.final_dir}. Please check consistency between the YAML '
                      f'{self.parent_project.bcbio_yaml_fpath} and the directories in `final`: '
                      f'to every "description" value in YAML, there should be a corresponding folder with the '
                      f'same name in `final`. You can use `-e` option to exclude samples (comma-separated) '
                      f'from consideration, if you are sure that missing folders are expected.')
+        self._files_prefix = adjust_path(join(self.dirpath, self.get_name_for_files()))
 
         self.bam = self.find_bam(silent=silent)
 
         if self.is_rnaseq:
-            gene_counts = adjust_path(join(self.dirpath, self.get_name_for_files() + '-ready.counts'))
+            gene_counts = self._files_prefix + '-ready.counts'
             if isfile(gene_counts) and verify_file(gene_counts):
                 self.counts_file = gene_counts
             else:
@@ -196,43 +242,46 @@ class BcbioSample(BaseSample):
                 if not silent: warn('No variant callers set in config, skipping finding VCF files')
 
     def _set_variant_callers(self, variantcallers_data, ensemble=False):
-        if isinstance(variantcallers_data, dict):
-            if 'germline' in variantcallers_data and self.phenotype == 'normal':
-                self.variantcallers = variantcallers_data.get('germline')
-            else:
-                self.variantcallers = variantcallers_data.get('somatic')
-
-        if isinstance(variantcallers_data, str):
-            self.variantcallers = [variantcallers_data]
-        elif isinstance(variantcallers_data, list):
-            self.variantcallers = variantcallers_data
+        parse_callers = _VARIANTCALLERS_DISPATCH.get(type(variantcallers_data))
+        if parse_callers:
+            self.variantcallers = parse_callers(variantcallers_data, self.phenotype)
 
         if ensemble and len(self.variantcallers) > 1:
             self.variantcallers = ['ensemble'] + self.variantcallers
 
+        # The caller with the lowest priority index wins; unknown callers rank last,
+        # so with no prioritized caller present this falls back to the first one
+        best_caller = min(self.variantcallers,
+                          key=lambda c: CALLER_PRIORITY_INDEX.get(c, len(CALLER_PRIORITY)))
         if self.phenotype != 'germline' and self.phenotype != 'normal':
-            self.somatic_caller = next((c for c in CALLER_PRIORITY if c in self.variantcallers),
-                                       self.variantcallers[0])
+            self.somatic_caller = best_caller
         else:
-            self.germline_caller = next((c for c in CALLER_PRIORITY if c in self.variantcallers),
-                                        self.variantcallers[0])
+            self.germline_caller = best_caller
 
     def find_sv_vcf(self):
-        return self.find_cnv_file(self.name + '-manta.vcf.gz') or \
-               self.find_cnv_file(self.name + '-lumpy.vcf.gz')
+        if 'sv_vcf' not in self._find_cache:
+            name = self.name
+            self._find_cache['sv_vcf'] = \
+                self.find_cnv_file(name + '-manta.vcf.gz') or \
+                self.find_cnv_file(name + '-lumpy.vcf.gz')
+        return self._find_cache['sv_vcf']
 
     def find_cnv_file(self, fname):
-        for fpath in [join(self.dirpath, fname)]:
-            if isfile(fpath):
-                return verify_file(fpath, silent=True)
+        if fname in self._dir_index():
+            return join(self.dirpath, fname)
 
     def find_coverage_stats(self):
-        sname = self.name
-        dirpath = self.dirpath
-        if self.phenotype == 'germline':
-            sname = re.sub(r'-germline$', '', sname)
-            dirpath = re.sub(r'-germline$', '', dirpath)
-        return verify_file(join(dirpath, 'qc', 'coverage', sname + '_coverage.bed'), silent=True)
+        if 'coverage_stats' not in self._find_cache:
+            sname = self.name
+            dirpath = self.dirpath
+            if self.phenotype == 'germline':
+                sname = GERMLINE_SUFFIX_RE.sub('', sname)
+                dirpath = GERMLINE_SUFFIX_RE.sub('', dirpath)
+            cov_dir = join(dirpath, 'qc', 'coverage')
+            fname = sname + '_coverage.bed'
+            self._find_cache['coverage_stats'] = \
+                join(cov_dir, fname) if fname in self._dir_index(cov_dir) else None
+        return self._find_cache['coverage_stats']
 
     def get_metric(self, names):
         if isinstance(names, str):
@@ -240,12 +289,18 @@ class BcbioSample(BaseSample):
         if not self.sample_info or not self.sample_info.get('metrics'):
             return None
         metrics = self.sample_info['metrics']
+        wanted = {n.lower() for n in names}
+        cache_key = tuple(sorted(wanted))
+        if cache_key in self._metric_cache:
+            return self._metric_cache[cache_key]
         val = None
         for k in metrics:
-            if k.lower() in [n.lower() for n in names] and metrics[k] != 'NA':
+            if k.lower() in wanted and metrics[k] != 'NA':
                 val = metrics[k]
+                break
         if val is None:
             err('Cannot find ' + ', '.join(names) + ' in metrics for ' + self.name)
+        self._metric_cache[cache_key] = val
         return val
 
     def get_avg_depth(self):
@@ -269,6 +324,18 @@ class BcbioBatch(BaseBatch):
         self.germline_caller = 'ensemble'
         self.sv_caller = 'manta'
 
+    def _find_vcf_in_candidates(self, candidates, kind, silent=False):
+        """ Resolves a ranked `candidates` table of (dirpath, fname, label) tuples
+            against the project's cached directory listings, returning the first
+            hit (verified) or None. `label` describes the location in log messages.
+        """
+        for dirpath, fname, label in candidates:
+            if fname in self.parent_project._dir_listing(dirpath):
+                fpath = verify_file(adjust_path(join(dirpath, fname)), is_critical=True)
+                if not silent: info(f'Found {kind} VCF in {label}: ' + fpath)
+                return fpath
+        return None
+
     def find_somatic_vcf(self, silent=False, caller=None):
         caller = caller or self.somatic_caller
         if not caller:
@@ -276,28 +343,25 @@ class BcbioBatch(BaseBatch):
                 warn(f'Batch {self.name} have no variant caler info assigned, skipping finding somatic VCF')
                 return
 
-        # in datestamp. cwl-bcbio writes there
-        vcf_cwl_fpath_gz = adjust_path(join(self.parent_project.date_dir, self.name + '-' + caller + '.vcf.gz'))
-        # in datestamp. bcbio before 1.1.6
-        vcf_old_fpath_gz = adjust_path(join(self.parent_project.date_dir, self.name + '-' + caller + '-annotated.vcf.gz'))
+        date_dir = self.parent_project.date_dir
+        tumor_dir = self.tumors[0].dirpath
+
         # in sample dir. starting from bcbio 1.1.6, ~ Dec 2019
-        vcf_fpath_gz = adjust_path(join(self.tumors[0].dirpath, self.tumors[0].name + '-' + caller + '.vcf.gz'))
+        vcf_fname = self.tumors[0].name + '-' + caller + '.vcf.gz'
+        # in datestamp. bcbio before 1.1.6
+        vcf_old_fname = self.name + '-' + caller + '-annotated.vcf.gz'
+        # in datestamp. cwl-bcbio writes there
+        vcf_cwl_fname = self.name + '-' + caller + '.vcf.gz'
 
-        if isfile(vcf_fpath_gz):
-            verify_file(vcf_fpath_gz, is_critical=True)
-            if not silent: info(f'Found somatic VCF in <final-dir>/<tumor-name>/<tumor-name>-{caller}.vcf.gz (conventional bcbio): ' + vcf_fpath_gz)
+        candidates = [
+            (tumor_dir, vcf_fname,     f'<final-dir>/<tumor-name>/<tumor-name>-{caller}.vcf.gz (conventional bcbio)'),
+            (date_dir,  vcf_old_fname, f'<date-dir>/<batch>-{caller}-annotated.vcf.gz (bcbio < v1.1.6))'),
+            (date_dir,  vcf_cwl_fname, f'project/<batch>-{caller}.vcf.gz (CWL bcbio)'),
+        ]
+        vcf_fpath_gz = self._find_vcf_in_candidates(candidates, kind='somatic', silent=silent)
+        if vcf_fpath_gz:
             self.somatic_vcf = vcf_fpath_gz
 
-        elif isfile(vcf_old_fpath_gz):
-            verify_file(vcf_old_fpath_gz, is_critical=True)
-            if not silent: info(f'Found somatic VCF in <date-dir>/<batch>-{caller}-annotated.vcf.gz (bcbio < v1.1.6)): ' + vcf_old_fpath_gz)
-            self.somatic_vcf = vcf_old_fpath_gz
-
-        elif isfile(vcf_cwl_fpath_gz):
-            verify_file(vcf_cwl_fpath_gz, is_critical=True)
-            if not silent: info(f'Found somatic VCF in project/<batch>-{caller}.vcf.gz (CWL bcbio): ' + vcf_cwl_fpath_gz)
-            self.somatic_vcf = vcf_cwl_fpath_gz
-
         elif not silent:
             warn(f'Could not find somatic variants files for batch {self.name}, caller {caller} neither as '
                  f'{self.parent_project.final_dir}/<tumor-name>/<tumor-name>-{caller}.vcf.gz (conventional bcbio), nor as '
@@ -312,23 +376,21 @@ class BcbioBatch(BaseBatch):
             return
         assert caller
 
+        date_dir = self.parent_project.date_dir
+
         # in sample dir. starting from bcbio 1.1.6, ~ Dec 2019
-        vcf_fpath_gz = adjust_path(join(self.parent_project.date_dir,
-                f'{self.normals[0].name}-germline-{caller}.vcf.gz'))
+        vcf_fname = f'{self.normals[0].name}-germline-{caller}.vcf.gz'
         # in datestamp. bcbio before 1.1.6
-        vcf_old_fpath_gz = adjust_path(join(self.parent_project.date_dir,
-                f'{self.normals[0].name}-germline-{caller}-annotated.vcf.gz'))
+        vcf_old_fname = f'{self.normals[0].name}-germline-{caller}-annotated.vcf.gz'
 
-        if isfile(vcf_fpath_gz):
-            verify_file(vcf_fpath_gz, is_critical=True)
-            if not silent: info(f'Found germline VCF in <date-dir>/<normal-name>-germline-{caller}.vcf.gz: ' + vcf_fpath_gz)
+        candidates = [
+            (date_dir, vcf_fname,     f'<date-dir>/<normal-name>-germline-{caller}.vcf.gz'),
+            (date_dir, vcf_old_fname, f'<date-dir>/<normal-name>-germline-{caller}-annotated.vcf.gz (bcbio < v1.1.6))'),
+        ]
+        vcf_fpath_gz = self._find_vcf_in_candidates(candidates, kind='germline', silent=silent)
+        if vcf_fpath_gz:
             self.germline_vcf = vcf_fpath_gz
 
-        elif isfile(vcf_old_fpath_gz):
-            verify_file(vcf_old_fpath_gz, is_critical=True)
-            if not silent: info(f'Found germline VCF in <date-dir>/<normal-name>-germline-{caller}-annotated.vcf.gz (bcbio < v1.1.6)): ' + vcf_old_fpath_gz)
-            self.germline_vcf = vcf_old_fpath_gz
-
         elif not silent:
             warn(f'Could not find germline variants files for batch {self.name}, caller {caller} neither as '
                  f'<date-dir>/<normal-name>-germline-{caller}.vcf.gz, nor as '
@@ -337,33 +399,24 @@ class BcbioBatch(BaseBatch):
     def find_sv_vcf(self, silent=False, caller=False):
         caller = caller or self.sv_caller
 
-        sv_prio   = join(self.tumors[0].dirpath, f'{self.name}-sv-prioritize-{caller}.vcf.gz')
-        sv_unprio = join(self.tumors[0].dirpath, f'{self.name}-{caller}.vcf.gz')
+        date_dir = self.parent_project.date_dir
+        tumor_dir = self.tumors[0].dirpath
+
+        sv_prio_fname   = f'{self.name}-sv-prioritize-{caller}.vcf.gz'
+        sv_unprio_fname = f'{self.name}-{caller}.vcf.gz'
         # CWL?
-        sv_cwl_prio   = join(self.parent_project.date_dir,
-                             f'{self.tumors[0].name}-{caller}-prioritized.vcf.gz')
-        sv_cwl_unprio = join(self.parent_project.date_dir,
-                             f'{self.tumors[0].name}-{caller}.vcf.gz')
-
-        if isfile(sv_prio):
-            verify_file(sv_prio, is_critical=True)
-            if not silent: info(f'Found SV VCF in <tumor>/<batch>-sv-prioritize-{caller}.vcf.gz: ' + sv_prio)
-            self.sv_vcf = sv_prio
-
-        elif isfile(sv_unprio):
-            verify_file(sv_unprio, is_critical=True)
-            if not silent: info(f'Found SV VCF in <tumor>/<batch>-{caller}.vcf.gz: ' + sv_unprio)
-            self.sv_vcf = sv_unprio
-
-        elif isfile(sv_cwl_prio):
-            verify_file(sv_cwl_prio, is_critical=True)
-            if not silent: info(f'Found SV VCF in <date-dir>/<tumor-name>-{caller}-prioritized.vcf.gz: ' + sv_cwl_prio)
-            self.sv_cwl_prio = sv_cwl_prio
-
-        elif isfile(sv_cwl_unprio):
-            verify_file(sv_cwl_unprio, is_critical=True)
-            if not silent: info(f'Found SV VCF in <date-dir>/<tumor-name>-{caller}.vcf.gz: ' + sv_cwl_prio)
-            self.sv_vcf = sv_cwl_unprio
+        sv_cwl_prio_fname   = f'{self.tumors[0].name}-{caller}-prioritized.vcf.gz'
+        sv_cwl_unprio_fname = f'{self.tumors[0].name}-{caller}.vcf.gz'
+
+        candidates = [
+            (tumor_dir, sv_prio_fname,       f'<tumor>/<batch>-sv-prioritize-{caller}.vcf.gz'),
+            (tumor_dir, sv_unprio_fname,     f'<tumor>/<batch>-{caller}.vcf.gz'),
+            (date_dir,  sv_cwl_prio_fname,   f'<date-dir>/<tumor-name>-{caller}-prioritized.vcf.gz'),
+            (date_dir,  sv_cwl_unprio_fname, f'<date-dir>/<tumor-name>-{caller}.vcf.gz'),
+        ]
+        sv_fpath_gz = self._find_vcf_in_candidates(candidates, kind='SV', silent=silent)
+        if sv_fpath_gz:
+            self.sv_vcf = sv_fpath_gz
 
         elif not silent:
             warn(f'Could not find SV VCF file for batch {self.name}, caller {caller} neither under sample folder as '
@@ -397,21 +450,25 @@ class BcbioBatch(BaseBatch):
                         rel_fp = rel_fp.split('call-multiqc_summary/execution/qc/multiqc/')[1]
                     tar_f_by_fp[rel_fp] = tar.extractfile(member)
 
+        # Compiled once here: the patterns are matched against every line of the file list
+        if isinstance(exclude_files, str):
+            exclude_files = [exclude_files]
+        exclude_regexs = [re.compile(ptn) for ptn in exclude_files or []]
+        if isinstance(include_files, str):
+            include_files = [include_files]
+        include_regexs = [re.compile(ptn) for ptn in include_files or []]
+
         qc_files_not_found = []
         qc_files_found = []
         with open(mq_filelist) as inp:
             for fp in [l.strip() for l in inp if l.strip()]:
                 if fp == 'trimmed' or fp.endswith('/trimmed'):
                     continue  # back-compatibility with bcbio
-                if exclude_files:
-                    if isinstance(exclude_files, str):
-                        exclude_files = [exclude_files]
-                    if any(re.search(ptn, fp) for ptn in exclude_files):
+                if exclude_regexs:
+                    if any(r.search(fp) for r in exclude_regexs):
                         continue
-                if include_files:
-                    if isinstance(include_files, str):
-                        include_files = [include_files]
-                    if not any(re.search(ptn, fp) for ptn in include_files):
+                if include_regexs:
+                    if not any(r.search(fp) for r in include_regexs):
                         continue
 
                 new_fp = _extract_qc_file(fp, dst_dir, self.parent_project.final_dir, tar_f_by_fp)
@@ -452,6 +509,7 @@ class BcbioProject(BaseProject):
         self.programs = None
 
         self.samples_by_caller = defaultdict(list)  # (caller, is_germline) -> [samples]
+        self.metric_columns = dict()  # metric name (lowercase) -> [values in self.samples order]
 
         self.variant_regions_bed = None
         self.sv_regions_bed = None          # "sv_regions" or "variant_regions"
@@ -466,6 +524,8 @@ class BcbioProject(BaseProject):
 
         self.silent = silent
 
+        self._dir_listings = dict()  # dirpath -> frozenset of entry names
+
         if input_dir:
             self.load_from_bcbio_dir(
                 input_dir, project_name, proc_name,
@@ -507,34 +567,38 @@ class BcbioProject(BaseProject):
 
     def set_samples(self, bcbio_cnf, include_samples=None, exclude_samples=None):
         debug('Reading sample details...')
-        exclude_samples = [s.replace('.', '_') for s in exclude_samples] if exclude_samples else None
-        include_samples = [s.replace('.', '_') for s in include_samples] if include_samples else None
+        exclude_samples = [s.translate(DOT_TO_UNDERSCORE) for s in exclude_samples] if exclude_samples else None
+        include_samples = [s.translate(DOT_TO_UNDERSCORE) for s in include_samples] if include_samples else None
 
         # First pass - just to get extra batch IDs that we need to include to have batches consistent
         extra_batches = set()
-        all_sample_names = set()
-        all_batch_names = set()
+        parsed_ids_by_info = dict()  # id(sample_info) -> (description, batch_names)
         if include_samples:
+            include_set = set(include_samples)
+            exclude_set = set(exclude_samples or [])
             for sample_info in bcbio_cnf['details']:
                 sname, batch_names = BcbioSample.parse_sample_ids(sample_info)
-                all_sample_names.add(sname)
-                all_batch_names |= set(batch_names)
-                if sname in include_samples:
-                    for b in batch_names:
-                        if b not in (include_samples or []) and b not in (exclude_samples or []):
-                            extra_batches.add(b)
-
-        # Second pass - including/excluding, and creating BcbioSample objects
-        for sample_info in bcbio_cnf['details']:
-            s = BcbioSample.load_from_sample_info(
+                parsed_ids_by_info[id(sample_info)] = (sname, batch_names)
+                if sname in include_set:
+                    extra_batches |= {b for b in batch_names
+                                      if b not in include_set and b not in exclude_set}
+
+        # Second pass - including/excluding, and creating BcbioSample objects.
+        # Each sample probes the filesystem independently (sample dir, BAM, counts),
+        # so the IO-bound loads are spread over a thread pool; map() keeps the YAML order
+        def _load(sample_info):
+            return BcbioSample.load_from_sample_info(
                 sample_info,
                 bcbio_project=self,
                 include_samples=include_samples,
                 exclude_samples=exclude_samples,
                 extra_batches=extra_batches,
+                parsed_ids=parsed_ids_by_info.get(id(sample_info)),
                 silent=self.silent)
-            if s:
-                self.samples.append(s)
+
+        details = bcbio_cnf['details']
+        with ThreadPoolExecutor(max_workers=min(16, max(1, len(details)))) as pool:
+            self.samples.extend(s for s in pool.map(_load, details) if s)
 
         if not self.samples:
             return
@@ -546,51 +610,83 @@ class BcbioProject(BaseProject):
         self.samples.sort(key=lambda _s: _s.key_to_sort())
         self.batch_by_name = self.update_batches(self.samples, self.silent)
 
-        def _check_dup_props(prop, is_critical=False):
-            _vals = set([s_.__dict__.get(prop) for s_ in self.samples])
+        props_to_check = ['genome_build', 'variant_regions_bed', 'coverage_bed', 'sv_regions_bed',
+                          'is_rnaseq', 'min_allele_fraction', 'is_wgs', 'coverage_interval']
+        # Single pass over the samples instead of one full pass per property
+        vals_by_prop = {prop: set() for prop in props_to_check}
+        for s_ in self.samples:
+            d_ = s_.__dict__
+            for prop in props_to_check:
+                vals_by_prop[prop].add(d_.get(prop))
+        for prop, _vals in vals_by_prop.items():
             if len(_vals) > 1:
-                (critical if is_critical else err)('Got different ' + prop + ' values in samples in ' + self.project_name)
+                err('Got different ' + prop + ' values in samples in ' + self.project_name)
             else:
                 self.__dict__[prop] = _vals.pop()
-        _check_dup_props('genome_build')
-        _check_dup_props('variant_regions_bed')
-        _check_dup_props('coverage_bed')
-        _check_dup_props('sv_regions_bed')
-        _check_dup_props('is_rnaseq')
-        _check_dup_props('min_allele_fraction')
-        _check_dup_props('is_wgs', is_critical=False)
-        _check_dup_props('coverage_interval', is_critical=False)
         if self.is_rnaseq:
             debug('RNAseq')
         elif self.coverage_interval:
             debug('Coverage interval: ' + str(self.coverage_interval))
 
         for s in self.samples:
+            is_germline = s.phenotype == 'germline'
             for caller in s.variantcallers:
-                self.samples_by_caller[(caller, s.phenotype == 'germline')].append(s)
+                self.samples_by_caller[(caller, is_germline)].append(s)
 
         debug('Done loading bcbio project ' + self.project_name)
 
     def _load_bcbio_summary(self):
         fp = self.find_in_log('project-summary.yaml')
         if fp:
-            with open(fp) as f:
-                data = yaml.safe_load(f)
-            metrics_by_sample = dict()
-            for s_data in data.get('samples', []):
-                metrics_by_sample[s_data['description']] = s_data.get('summary', dict()).get('metrics')
+            metrics_by_sample = self._read_summary_metrics(fp)
             for s in self.samples:
                 sname = s.name
                 if s.phenotype == 'germline':
-                    sname = re.sub(r'-germline$', '', s.name)
+                    sname = GERMLINE_SUFFIX_RE.sub('', s.name)
                 assert sname in metrics_by_sample, f'Need: {sname}, available: {str(metrics_by_sample.keys())}'
                 s.sample_info['metrics'] = metrics_by_sample[sname]
 
+            # Column-oriented view of the metrics, so project-wide reports can pull one metric
+            # for all samples in a single lookup instead of walking every sample's dict
+            lower_metrics = [{k.lower(): v for k, v in (s.sample_info.get('metrics') or dict()).items()
+                              if v != 'NA'}
+                             for s in self.samples]
+            metric_names = {m for ms in lower_metrics for m in ms}
+            self.metric_columns = {m: [ms.get(m) for ms in lower_metrics] for m in metric_names}
+
+    @staticmethod
+    def _read_summary_metrics(fp):
+        """ Extracts per-sample metrics from project-summary.yaml. The summary is read-only once
+            bcbio is done, so the extract is pickled next to it keyed on mtime: unpickling the
+            small metrics dict is much faster than re-parsing the multi-MB YAML on every load.
+        """
+        pickled_fp = fp + '.metrics.pkl'
+        if isfile(pickled_fp) and getmtime(pickled_fp) >= getmtime(fp):
+            try:
+                with open(pickled_fp, 'rb') as f:
+                    return pickle.load(f)
+            except Exception:
+                debug('Could not read pickled metrics ' + pickled_fp + ', re-parsing ' + fp)
+
+        data = load_yaml_config(fp)
+        metrics_by_sample = dict()
+        for s_data in data.get('samples', []):
+            metrics_by_sample[s_data['description']] = s_data.get('summary', dict()).get('metrics')
+
+        try:
+            tmp_fp = pickled_fp + '.tmp'
+            with open(tmp_fp, 'wb') as f:
+                pickle.dump(metrics_by_sample, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_fp, pickled_fp)
+        except OSError:
+            pass  # the datestamp dir can be read-only; the cache is optional
+        return metrics_by_sample
+
     def config_path(self, val):
         if not val:
             return val
         full_path = adjust_path(join(self.config_dir, val))
-        if exists(full_path):
+        if cached_stat(full_path) is not None:
             return full_path
         else:
             return val
@@ -610,10 +706,13 @@ class BcbioProject(BaseProject):
                     date_dir = join(final_dir, 'project')
                     if not silent: info('Using the datestamp dir from bcbio-CWL: ' + date_dir)
                 else:
-                    regexs = [fr'^\d\d\d\d-[01][0-9]-[0-3][0-9]_{fc_name}']
-                    date_dirs = [join(final_dir, dirpath)
-                                 for dirpath in listdir(final_dir)
-                                 if any(re.match(regex, dirpath) for regex in regexs)]
+                    # Combined into one alternation so adding patterns doesn't multiply match calls per entry
+                    regexs = [r'^\d\d\d\d-[01][0-9]-[0-3][0-9]_' + re.escape(fc_name)]
+                    datestamp_re = re.compile('|'.join(f'(?:{r})' for r in regexs))
+                    # scandir caches the entry type, so is_dir() doesn't cost an extra stat per entry
+                    with os.scandir(final_dir) as it:
+                        date_dirs = [e.path for e in it
+                                     if e.is_dir() and datestamp_re.match(e.name)]
                     if len(date_dirs) == 0:
                         raise NoDateStampsException('Error: no datestamp directory!')
                     elif len(date_dirs) == 1:
@@ -660,16 +759,18 @@ class BcbioProject(BaseProject):
 
     def update_batches(self, samples, silent=False):
         batch_by_name = {bn: BcbioBatch(name=bn, parent_project=self)
-                         for bn in list(set([b for s in samples for b in s.batch_names]))}
+                         for s in samples for bn in s.batch_names}
 
         for sample in samples:
+            is_normal = sample.phenotype == 'normal'
             for bn in sample.batch_names:
-                batch_by_name[bn].name = bn
-                sample.batches.append(batch_by_name[bn])
-                if sample.phenotype == 'normal':
-                    batch_by_name[bn].add_normal(sample)
+                batch = batch_by_name[bn]
+                batch.name = bn
+                sample.batches.append(batch)
+                if is_normal:
+                    batch.add_normal(sample)
                 else:
-                    batch_by_name[bn].add_tumor(sample)
+                    batch.add_tumor(sample)
 
         # Removing batches that do not have matching tumor samples
         batch_by_name = {bn: b for bn, b in batch_by_name.items() if b.tumors}
@@ -714,11 +815,30 @@ class BcbioProject(BaseProject):
 
         return batch_by_name
 
+    def _dir_listing(self, dirpath):
+        """ Names of entries in `dirpath`, read once per project with a single scandir.
+            The find_* methods probe many candidate file names in the same few directories,
+            so membership in this set replaces one stat syscall per candidate.
+        """
+        listing = self._dir_listings.get(dirpath)
+        if listing is None:
+            try:
+                with os.scandir(dirpath) as it:
+                    listing = frozenset(e.name for e in it)
+            except (FileNotFoundError, NotADirectoryError):
+                listing = frozenset()
+            self._dir_listings[dirpath] = listing
+        return listing
+
+    def invalidate_dir_listings(self):
+        """ Call after a pipeline re-run wrote new files into the project directories """
+        self._dir_listings.clear()
+
     def find_in_log(self, fname, is_critical=False, silent=True):
         options = [join(self.log_dir, fname),
                    join(self.date_dir, fname)]
         for fpath in options:
-            if isfile(fpath):
+            if cached_isfile(fpath):
                 return fpath
         if is_critical:
             critical('Log file not found as ' + ', '.join(options))
@@ -762,13 +882,19 @@ def detect_bcbio_dir(input_dir, silent=False):
     """
     config_dir, final_dir, date_dir = None, None, None
 
+    # Candidate paths are normalized and stat'ed at most once each
     input_dir = abspath(input_dir)
+    input_dirname = basename(input_dir)
+    parent_dir = dirname(input_dir)
+    grandparent_dir = dirname(parent_dir)
+    config_in_input = join(input_dir, 'config')
+    config_in_parent = join(parent_dir, 'config')
+    config_in_grandparent = join(grandparent_dir, 'config')
 
     # We are inside `*final*`
-    if 'final' in basename(input_dir):  # allow prefixes and postfixes
+    if 'final' in input_dirname:  # allow prefixes and postfixes
         final_dir = input_dir
-        root_dir = dirname(final_dir)
-        config_dir = join(root_dir, 'config')
+        config_dir = config_in_parent
         if not isdir(config_dir):
             err(f'Are you running on a bcbio output?\n'
                 f'The input folder appear to be `final` ({input_dir}), '
@@ -776,18 +902,17 @@ def detect_bcbio_dir(input_dir, silent=False):
             raise NoConfigDirException('No config dir')
 
     # We are inside `config`
-    elif basename(input_dir) == 'config':
+    elif input_dirname == 'config':
         config_dir = input_dir
 
     # We are in a parent dir to `config` (and possibly `final`, called otherwise)
-    elif isdir(join(input_dir, 'config')):
-        config_dir = join(input_dir, 'config')
+    elif isdir(config_in_input):
+        config_dir = config_in_input
 
     # We are inside a date dir
-    elif isdir(abspath(join(input_dir, pardir, pardir, 'config'))):
-        final_dir = abspath(join(input_dir, pardir))
-        root_dir = abspath(join(input_dir, pardir, pardir))
-        config_dir = abspath(join(root_dir, 'config'))
+    elif isdir(config_in_grandparent):
+        final_dir = parent_dir
+        config_dir = config_in_grandparent
 
         # if 'final' not in basename(final_dir):
         #     err(f'Are you running on a bcbio output?\n'
@@ -799,8 +924,8 @@ def detect_bcbio_dir(input_dir, silent=False):
         if not silent:
             err(f'Are you running on a bcbio output?\n'
                 f'{input_dir} is not `config` or `*final*`, and '
-                f'can\'t find a `config` directory at {join(input_dir, "config")}, '
-                f'or {abspath(join(input_dir, pardir, "config"))}.'
+                f'can\'t find a `config` directory at {config_in_input}, '
+                f'or {config_in_parent}.'
                 f'Make sure that you changed to a bcbio root or final directory, '
                 f'or provided it as a first argument.')
         raise NoConfigDirException('No config dir')
@@ -816,18 +941,32 @@ def detect_bcbio_dir(input_dir, silent=False):
     return config_dir, final_dir, date_dir
 
 
+_DETAILS_KEY_RE = re.compile(r'^details\s*:')
+
+
+def _has_details_section(fpath):
+    """ Cheap line scan for a root-level `details:` key, so that template and
+        auxiliary YAMLs in the config dir are skipped without a full parse
+    """
+    try:
+        with open(fpath) as f:
+            return any(_DETAILS_KEY_RE.match(l) for l in f)
+    except OSError:
+        return False
+
+
 def load_bcbio_cnf(config_dir, silent=False):
-    all_yamls = [
-        abspath(join(config_dir, fname))
-        for fname in listdir(config_dir)
-        if fname.endswith('.yaml')]
+    with os.scandir(config_dir) as it:
+        all_yamls = [
+            abspath(e.path) for e in it
+            if e.name.endswith('.yaml') and e.is_file()]
     if len(all_yamls) == 0:
         critical('No YAML file in the config directory.')
 
     bcbio_yamls = []
     for fpath in all_yamls:
         if not fpath.endswith('-template.yaml'):
-            if 'details' in load_yaml_config(fpath):
+            if _has_details_section(fpath) and 'details' in load_yaml_config(fpath):
                 bcbio_yamls.append(fpath)
     if len(bcbio_yamls) == 0:
         critical('No bcbio YAMLs found in the config directory: ' + config_dir +
@@ -850,10 +989,24 @@ def ungzip_if_needed(cnf, fpath, silent=False):
         fpath = fpath[:-3]
     if not file_exists(fpath) and file_exists(fpath + '.gz'):
         gz_fpath = fpath + '.gz'
-        cmdline = 'gunzip -c {gz_fpath} > {fpath}'.format(**locals())
-        res = run_simple(cmdline)
-        if not silent: info()
-        if not res:
-            return None
+        try:
+            # Decompressing in-process avoids a fork+exec of a shell and gunzip per file
+            with gzip.open(gz_fpath, 'rb') as src, open(fpath, 'wb') as dst:
+                shutil.copyfileobj(src, dst, length=1 << 20)
+        except (OSError, EOFError, zlib.error):
+            # The gzip module raises EOFError/zlib.error on truncated or corrupt
+            # input that gunzip may still accept; drop the partial output so it
+            # isn't mistaken for a successful decompression later
+            if isfile(fpath):
+                os.unlink(fpath)
+            cmdline = 'gunzip -c {gz_fpath} > {fpath}'.format(**locals())
+            res = run_simple(cmdline)
+            invalidate_stat_cache(fpath)
+            if not silent: info()
+            if not res:
+                return None
+        else:
+            invalidate_stat_cache(fpath)
+            if not silent: info()
     return fpath
 
@@ -1,6 +1,13 @@
+import copy
+import os
 from contextlib import contextmanager
+from functools import lru_cache
 from traceback import format_exc
 import yaml
+try:
+    from yaml import CSafeLoader as YamlLoader  # libyaml-based, ~10x faster
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 
 from .logger import info, err, critical, debug, warn
 from .file_utils import verify_file
@@ -9,19 +16,29 @@ from .utils import update_dict
 
 def _load_yaml(fname):
     with open(fname) as in_handle:
-        config = yaml.safe_load(in_handle)
+        config = yaml.load(in_handle, Loader=YamlLoader)
     return config
 
 
+@lru_cache(maxsize=32)
+def _load_yaml_cached(fname, mtime):
+    """ `mtime` is only used as a cache key, so edits to the file still invalidate the cache
+    """
+    return _load_yaml(fname)
+
+
 def load_yaml_config(fpath):
     verify_file(fpath, is_critical=True)
     try:
-        dic = _load_yaml(fpath)
+        dic = _load_yaml_cached(fpath, os.stat(fpath).st_mtime_ns)
     except Exception:
         err(format_exc())
         critical('Could not parse bcbio YAML ' + fpath)
     else:
-        return dic
+        # Callers mutate loaded configs (fill_dict_from_defaults, with_cnf, sample
+        # info annotation), so hand out a copy to keep the cached parse pristine.
+        # Deep-copying is still much cheaper than re-parsing the YAML.
+        return copy.deepcopy(dic)
 
 
 def fill_dict_from_defaults(cur_cnf, defaults_dict):
@@ -1,5 +1,6 @@
 import os
 import sys
+from functools import lru_cache
 from os.path import dirname, join, abspath, isfile, pardir
 from pybedtools import BedTool
 from ngs_utils.file_utils import which, open_gzipsafe, verify_file
@@ -169,7 +170,12 @@ def _get_ensembl_file(fname, genome=None):
 ###################
 ### TRANSCRIPTS ###
 ###################
+@lru_cache(maxsize=8)
 def get_canonical_transcripts_ids(genome):
+    """ Cached per genome: the transcripts files don't change during a run, and
+        variant-filtering pipelines ask for this per sample or per batch.
+        Callers should treat the returned dict as read-only.
+    """
     short_genome = genome.split('-')[0]
     if short_genome.startswith('GRCh37'):
         short_genome = 'hg19'
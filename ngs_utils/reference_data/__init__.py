@@ -1,3 +1,4 @@
+from functools import lru_cache
 from os.path import dirname, join, abspath, splitext, isfile
 
 from ngs_utils.file_utils import verify_file, adjust_path, verify_dir
@@ -30,7 +31,11 @@ def _get(relative_path, genome=None, is_critical=False):
 def get_fai(genome, is_critical=False):
     return _get(join('fai', '{genome}.fa.fai'), genome, is_critical=is_critical)
 
+@lru_cache(maxsize=8)
 def get_chrom_lengths(genome=None, fai_fpath=None):
+    """ Cached per (genome, fai_fpath): the result is a pure function of the index
+        file, so repeated callers share one parse. Treat the result as read-only.
+    """
     assert genome or fai_fpath, f'One of genome or fai_fpath should be not None: genome={genome}, fai_fpath={fai_fpath}'
 
     if not fai_fpath:
@@ -56,13 +61,13 @@ def get_chrom_lengths(genome=None, fai_fpath=None):
         debug('Reading genome index file (.fai) to get chromosome lengths')
         with open(fai_fpath, 'r') as handle:
             for line in handle:
-                line = line.strip()
-                if line:
-                    chrom, length = line.split()[0], int(line.split()[1])
-                    chr_lengths.append((chrom, length))
+                fields = line.split()
+                if fields:
+                    chr_lengths.append((fields[0], int(fields[1])))
 
     return chr_lengths
 
+@lru_cache(maxsize=8)
 def get_chrom_order(genome=None, fai_fpath=None):
     chr_lengths = get_chrom_lengths(genome, fai_fpath)
     chr_order = {c: i for i, (c, l) in enumerate(chr_lengths)}
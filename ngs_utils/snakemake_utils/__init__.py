@@ -1,3 +1,4 @@
+import atexit
 import math
 from random import random
 import string
@@ -11,6 +12,10 @@ from ngs_utils.file_utils import safe_mkdir
 from ngs_utils.utils import flatten
 import tempfile
 import yaml
+try:
+    from yaml import CSafeDumper as YamlDumper  # libyaml-based, much faster on large configs
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
 from ngs_utils.call_process import run_simple
 
 
@@ -22,6 +27,11 @@ def get_submit_script():
     return 'python ' + join(package_path(), 'submit')
 
 
+# (jobscript path, template, PATH) combinations already written to disk, so repeated
+# make_cluster_cmdl calls in one run don't rewrite an identical jobscript every time
+_written_jobscripts = dict()
+
+
 def make_cluster_cmdl(log_dir, refdata, app_name, cluster_submit_cmd=None):
     """ Generates cluster command line parameters for snakemake
     """
@@ -46,8 +56,11 @@ def make_cluster_cmdl(log_dir, refdata, app_name, cluster_submit_cmd=None):
     if jobscript:
         safe_mkdir(log_dir)
         jobscript_file = join(log_dir, 'jobscript.sh')
-        with open(jobscript_file, 'w') as f_out:
-            f_out.write(jobscript.replace('{path}', os.environ["PATH"]))
+        cache_key = (jobscript_file, jobscript, os.environ["PATH"])
+        if cache_key not in _written_jobscripts or not os.path.isfile(jobscript_file):
+            with open(jobscript_file, 'w') as f_out:
+                f_out.write(jobscript.replace('{path}', os.environ["PATH"]))
+            _written_jobscripts[cache_key] = True
         cluster_cmdl += f' --jobscript "{jobscript_file}"'
 
     return cluster_cmdl
@@ -87,7 +100,8 @@ def run_snakemake(snakefile, conf, cores=None, output_dir=None, forcerun=None,
         conf_f = open(join(log_dir, '.conf.yaml'), 'w')
     else:
         conf_f = tempfile.NamedTemporaryFile(mode='wt', delete=False)
-    yaml.dump(conf, conf_f)
+        atexit.register(os.unlink, conf_f.name)  # delete=False would leak the file otherwise
+    yaml.dump(conf, conf_f, Dumper=YamlDumper)
     conf_f.close()
 
     ###############################
@@ -1,11 +1,17 @@
+import filecmp
+import gzip
+import re
+import shlex
 import subprocess
 import unittest
 import os
+from concurrent.futures import ThreadPoolExecutor
 from os.path import dirname, join, exists, isfile, splitext, basename, isdir, relpath, getctime, getsize, realpath, \
     islink
 import sys
 from datetime import datetime
-from glob import glob
+from fnmatch import fnmatch
+from glob import glob, has_magic
 
 from .file_utils import verify_dir, verify_file, safe_mkdir
 from .utils import is_travis
@@ -14,28 +20,48 @@ from .utils import is_travis
 def echo(msg=''):
     sys.stderr.write(msg + '\n')
 
+SHELL_META_CHARS_RE = re.compile(r'[|&;<>()$`\\"\'*?~\[\]{}]')
+
+def _as_argv(cmdl):
+    """ Splits string commands without shell features into an argv list, so simple
+        commands skip the extra bash fork. Returns None when bash is still required
+        (pipes, redirections, process substitution, globs, newline-separated
+        commands, env-assignment prefixes etc).
+    """
+    if not isinstance(cmdl, str):
+        return cmdl
+    if '\n' in cmdl or SHELL_META_CHARS_RE.search(cmdl):
+        return None
+    argv = shlex.split(cmdl)
+    if argv and '=' in argv[0]:  # VAR=val prefix needs the shell
+        return None
+    return argv
+
 def call(cmdl, suppress_output=False):
     echo(cmdl if isinstance(cmdl, str) else subprocess.list2cmdline(cmdl))
-    if isinstance(cmdl, str):
+    argv = _as_argv(cmdl)
+    if argv is None:
         return subprocess.call(cmdl, shell=True, executable='/bin/bash',
                                stdout=subprocess.DEVNULL if suppress_output else None)
     else:
-        return subprocess.call(cmdl,
+        return subprocess.call(argv,
                                stdout=subprocess.DEVNULL if suppress_output else None)
 
 def check_call(cmdl):
     echo(cmdl if isinstance(cmdl, str) else subprocess.list2cmdline(cmdl))
-    if isinstance(cmdl, str):
+    argv = _as_argv(cmdl)
+    if argv is None:
         subprocess.check_call(cmdl, shell=True, executable='/bin/bash')
     else:
-        subprocess.check_call(cmdl)
+        subprocess.check_call(argv)
 
 def check_output(cmdl):
     echo(cmdl if isinstance(cmdl, str) else subprocess.list2cmdline(cmdl))
-    if isinstance(cmdl, str):
+    argv = _as_argv(cmdl)
+    if argv is None:
         return subprocess.check_output(cmdl, shell=True, executable='/bin/bash', stderr=subprocess.STDOUT)
     else:
-        return subprocess.check_output(cmdl, stderr=subprocess.STDOUT)
+        return subprocess.check_output(argv, stderr=subprocess.STDOUT)
 
 def swap_output(output_path):
     if not exists(output_path):
@@ -81,10 +107,8 @@ class BaseTestCase(unittest.TestCase):
     remove_work_dir_on_success = False
 
     def setUp(self):
-        if not isdir(self.data_dir):
-            os.makedirs(self.data_dir)
-        if not exists(self.results_dir):
-            os.makedirs(self.results_dir)
+        os.makedirs(self.data_dir, exist_ok=True)
+        os.makedirs(self.results_dir, exist_ok=True)
 
     def _run_cmd(self, cmdl, input_paths, output_path, before_run_fn=None):
         only_diff  = BaseTestCase.only_diff or any('TEST' in e.upper() and 'DIFF'  in e.upper() for e in os.environ)
@@ -114,7 +138,7 @@ class BaseTestCase(unittest.TestCase):
 
     def _check_file_throws(self, wc_fpath, ignore_matching_lines=None, wrapper=None, cmp_line_number_only=True,
                            check_diff=True):
-        found = glob(wc_fpath)
+        found = self._glob_first_matches(wc_fpath)
         assert found, 'file is not found ' + wc_fpath
         assert len(found) == 1, 'more than 1 file is found as ' + wc_fpath
         fpath = found[0]
@@ -126,13 +150,18 @@ class BaseTestCase(unittest.TestCase):
         else:
             cmp_wc_path = get_prev(wc_fpath)
 
-        cmp_found = glob(cmp_wc_path)
+        cmp_found = self._glob_first_matches(cmp_wc_path)
         assert cmp_found, 'cmp_file not found (no gold standard dir or *_prev file): ' + cmp_wc_path
         assert len(cmp_found) == 1, 'more than 1 cmp_file is found as ' + cmp_wc_path
         cmp_fpath = cmp_found[0]
         assert isfile(cmp_fpath), 'cmp_file is not a file: ' + cmp_fpath
 
         if check_diff:
+            if not ignore_matching_lines and not wrapper:
+                # Bit-identical files don't need a diff subprocess at all; fall
+                # through to diff only to get a readable report on mismatch
+                if self._files_identical(fpath, cmp_fpath):
+                    return
             cmdl = 'diff'
             if ignore_matching_lines:
                 if isinstance(ignore_matching_lines, str):
@@ -155,6 +184,70 @@ class BaseTestCase(unittest.TestCase):
             ret_code = call(cmdl, suppress_output=not is_travis())
             assert ret_code == 0, 'diff returned non-zero: ' + fpath
 
+    @staticmethod
+    def _glob_first_matches(wc_path, limit=2):
+        """ First `limit` matches of a wildcard path: a single scandir pass with an
+            early exit instead of a full glob, since callers only need to check
+            existence and uniqueness
+        """
+        dirpath, pattern = os.path.split(wc_path)
+        if has_magic(dirpath):
+            return glob(wc_path)[:limit]  # wildcards in the dir part need the full glob
+        matches = []
+        skip_hidden = not pattern.startswith('.')  # glob doesn't match dotfiles
+        try:
+            with os.scandir(dirpath or '.') as it:
+                for e in it:
+                    if skip_hidden and e.name.startswith('.'):
+                        continue
+                    if fnmatch(e.name, pattern):
+                        matches.append(e.path)
+                        if len(matches) >= limit:
+                            break
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        return matches
+
+    @staticmethod
+    def _files_identical(fpath, cmp_fpath):
+        """ Fast content-equality check: block compare for plain files, streamed
+            decompression for a pair of gzipped files. Returns False on any doubt.
+        """
+        try:
+            if fpath.endswith('.gz') and cmp_fpath.endswith('.gz'):
+                with gzip.open(fpath, 'rb') as f1, gzip.open(cmp_fpath, 'rb') as f2:
+                    while True:
+                        b1 = f1.read(1 << 20)
+                        b2 = f2.read(1 << 20)
+                        if b1 != b2:
+                            return False
+                        if not b1:
+                            return True
+            if not fpath.endswith('.gz') and not cmp_fpath.endswith('.gz'):
+                return filecmp.cmp(fpath, cmp_fpath, shallow=False)
+        except OSError:
+            pass
+        return False
+
+    def check_files(self, specs):
+        """ Runs _check_file_throws for multiple output files in parallel.
+            `specs` is a list of wildcard paths, or of (wildcard_path, kwargs) pairs where
+            kwargs are passed through to _check_file_throws. Diffing is mostly subprocess
+            and filesystem work, so independent comparisons overlap well; all failures
+            are collected and reported together.
+        """
+        specs = [(spec, dict()) if isinstance(spec, str) else spec for spec in specs]
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(8, max(1, len(specs)))) as pool:
+            futures = [pool.submit(self._check_file_throws, wc_fpath, **kwargs)
+                       for wc_fpath, kwargs in specs]
+            for (wc_fpath, _), future in zip(specs, futures):
+                try:
+                    future.result()
+                except AssertionError as e:
+                    errors.append(f'{wc_fpath}: {e}')
+        assert not errors, '\n'.join(errors)
+
     @staticmethod
     def _check_dir_not_empty(dirpath, description=None):
         assert verify_dir(dirpath, description=description), dirpath